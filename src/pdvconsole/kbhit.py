@@ -39,14 +39,50 @@ from collections.abc import Callable
 
 # Windows
 if sys.platform == "win32":
+    import ctypes
     import msvcrt
+    from ctypes import wintypes
+
+    STD_INPUT_HANDLE = -10
+    WAIT_OBJECT_0 = 0
+
+    class _INPUT_RECORD(ctypes.Structure):
+        """INPUT_RECORD sized buffer, discarded events are never inspected."""
+
+        _fields_ = [
+            ("EventType", wintypes.WORD),
+            ("_padding", wintypes.WORD),
+            ("Event", ctypes.c_byte * 16),
+        ]
+
+    # Own loader so the signatures set here do not leak into ctypes.windll
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.GetStdHandle.argtypes = (wintypes.DWORD,)
+    kernel32.GetStdHandle.restype = wintypes.HANDLE
+    kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+    kernel32.WaitForSingleObject.restype = wintypes.DWORD
+    kernel32.GetNumberOfConsoleInputEvents.argtypes = (
+        wintypes.HANDLE,
+        ctypes.POINTER(wintypes.DWORD),
+    )
+    kernel32.GetNumberOfConsoleInputEvents.restype = wintypes.BOOL
+    kernel32.ReadConsoleInputW.argtypes = (
+        wintypes.HANDLE,
+        ctypes.POINTER(_INPUT_RECORD),
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+    )
+    kernel32.ReadConsoleInputW.restype = wintypes.BOOL
 
 # Posix (Linux, OS X)
 else:
     import sys
     import termios
     import atexit
-    from select import select
+    import selectors
+
+# Time the listener blocks waiting for input before re-checking for a stop
+WAIT_TIMEOUT_MS = 100
 
 
 class _KBHit:
@@ -54,7 +90,7 @@ class _KBHit:
         """Creates a KBHit object that you can call to do various keyboard things."""
 
         if sys.platform == "win32":
-            pass
+            self._handle = kernel32.GetStdHandle(STD_INPUT_HANDLE)
 
         else:
             # Save the terminal settings
@@ -66,6 +102,10 @@ class _KBHit:
             self.new_term[3] = self.new_term[3] & ~termios.ICANON & ~termios.ECHO
             termios.tcsetattr(self.fd, termios.TCSAFLUSH, self.new_term)
 
+            # Register stdin once; DefaultSelector is epoll/kqueue where available
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(sys.stdin, selectors.EVENT_READ)
+
             # Support normal-terminal reset at exit
             atexit.register(self.set_normal_term)
 
@@ -73,6 +113,7 @@ class _KBHit:
         """Resets to normal terminal.  On Windows this is a no-op."""
         if sys.platform != "win32":
             termios.tcsetattr(self.fd, termios.TCSAFLUSH, self.old_term)
+            self._selector.close()
 
     def getch(self) -> str:
         """Returns a keyboard character after kbhit() has been called.
@@ -109,21 +150,63 @@ class _KBHit:
             return msvcrt.kbhit()
 
         else:
-            dr, dw, de = select([sys.stdin], [], [], 0)
-            return dr != []
+            return bool(self._selector.select(timeout=0))
+
+    def wait(self, timeout_ms: int) -> bool:
+        """Blocks until a keyboard character is hit or the timeout elapses.
+        Returns True if a character is ready to be read, False otherwise.
+        """
+        if sys.platform == "win32":
+            if kernel32.WaitForSingleObject(self._handle, timeout_ms) != WAIT_OBJECT_0:
+                return False
+
+            # Signaled by events getch() skips (mouse, focus, key up, keys with
+            # no character), drop them so the next wait blocks.
+            self._discard_unreadable_events()
+            return msvcrt.kbhit()
+
+        else:
+            return bool(self._selector.select(timeout=timeout_ms / 1000))
+
+    def _discard_unreadable_events(self) -> None:
+        """Reads and drops console input events until getch() has a key to read
+        or none are left. Only used on Windows.
+        """
+        if sys.platform == "win32":
+            record = _INPUT_RECORD()
+            count = wintypes.DWORD()
+            # Count before asking kbhit(), so the oldest event read below was
+            # already queued when kbhit() found nothing getch() would return.
+            while (
+                kernel32.GetNumberOfConsoleInputEvents(
+                    self._handle, ctypes.byref(count)
+                )
+                and count.value
+                and not msvcrt.kbhit()
+            ):
+                kernel32.ReadConsoleInputW(
+                    self._handle, ctypes.byref(record), 1, ctypes.byref(count)
+                )
 
 
 class KeyboardListener:
     """A class that listens for keyboard input and calls a given function."""
 
-    def __init__(self, on_press: Callable[[str], bool]) -> None:
+    def __init__(
+        self,
+        on_press: Callable[[str], bool],
+        on_stop: Callable[[], None] | None = None,
+    ) -> None:
         """
         Creates a listener that calls the given function on keyboard input.
 
         Args:
             on_press: A function that takes a single character and returns
                 True to continue listening.
+            on_stop: An optional function called from the listener thread
+                once it stops listening.
         """
+        self._on_stop = on_stop
         self._thread = self._build_listener(on_press)
         self._stop = False
         self._keyboard = _KBHit()
@@ -148,11 +231,18 @@ class KeyboardListener:
 
         def listen() -> None:
             """Listens for keyboard input and calls the given function."""
-            while not self._stop:
-                if self._keyboard.kbhit():
-                    c = self._keyboard.getch()
-                    if not on_press(c):
-                        break
-            self._keyboard.set_normal_term()
+            try:
+                while not self._stop:
+                    if self._keyboard.wait(WAIT_TIMEOUT_MS):
+                        c = self._keyboard.getch()
+                        if not on_press(c):
+                            break
+
+            # Always restore the terminal and report the stop, even if reading
+            # a key or handling it raised and is killing this thread.
+            finally:
+                self._keyboard.set_normal_term()
+                if self._on_stop is not None:
+                    self._on_stop()
 
         return threading.Thread(target=listen)
@@ -3,7 +3,12 @@ from __future__ import annotations
 
 import asyncio
 import dataclasses
-from collections.abc import AsyncGenerator
+import heapq
+import math
+import operator
+import time
+from collections.abc import Callable
+from collections.abc import Collection
 from datetime import datetime
 from enum import Enum
 from typing import Any
@@ -24,11 +29,27 @@ MIN_DISPLAY_ROWS = 5
 PANEL_OFFSET = 6  # Number of rows used by the header and footer
 # Time between PagerDuty API calls in seconds
 POLL_TIME_SECONDS = int(secrets.get("POLL_TIME_SECONDS", "60"))
+# Polls with no changes double the interval up to this cap, off by default
+# A cap below POLL_TIME_SECONDS would poll faster than asked, so it is ignored
+POLL_MAX_SECONDS = max(
+    int(secrets.get("POLL_MAX_SECONDS", str(POLL_TIME_SECONDS))),
+    POLL_TIME_SECONDS,
+)
+# PagerDuty user id used to flag incidents assigned to you
+USER_ID = secrets.get("PAGERDUTY_USER_ID", "")
 POLL_LIMIT = 25  # Number of incidents to return per API call
+POLL_CONCURRENCY = 8  # Max number of incident pages requested at once
+PAGERDUTY_URL = "https://api.pagerduty.com"
 
-INCIDENT_ROW = (
-    "{assigned:^3}|{status:^6}|{urgency:^6}|{priority:^4}|{duration:>4.0f}m | {title}"
-)
+PRIORITY_CACHE_SECONDS = 1800  # Time a fetched list of priorities is reused
+
+_TIME_CACHE: tuple[int, str] = (0, "")  # (epoch second, formatted time)
+
+
+URGENCY_RANK = {"high": 1, "low": 2}
+PRIORITY_KEYS = frozenset("1234567890")
+URGENCY_KEYS = {"h": "high", "l": "low", "a": None}
+QUIT_KEYS = frozenset("qQ")
 
 
 class SortBy(Enum):
@@ -39,10 +60,41 @@ class SortBy(Enum):
     URGENCY = 2
 
 
+# Sort keys that only read Incident attributes, priority needs the rank map
+SORT_KEYS: dict[SortBy, Callable[[Incident], Any]] = {
+    SortBy.CREATED_AT: operator.attrgetter("created_ts"),
+    SortBy.URGENCY: operator.attrgetter("urgency_rank", "created_ts"),
+}
+
+
+class _IncidentDerived:
+    """Slots for the values Incident derives from its fields in __post_init__."""
+
+    # Declared outside the dataclass so they are not fields, keeping them out
+    # of __init__, repr and equality
+    __slots__ = ("created_at_dt", "created_ts", "urgency_rank", "row_prefix")
+
+    created_at_dt: datetime
+    created_ts: float
+    urgency_rank: int
+    row_prefix: str  # Incident panel columns that never change for the incident
+
+
 @dataclasses.dataclass(frozen=True)
-class Incident:
+class Incident(_IncidentDerived):
     """Incident class."""
 
+    # Declared by hand, dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        "pdid",
+        "title",
+        "urgency",
+        "status",
+        "priority",
+        "created_at",
+        "self_assigned",
+    )
+
     pdid: str
     title: str
     urgency: str
@@ -50,34 +102,47 @@ class Incident:
     priority: str
     created_at: str
     self_assigned: bool
-    last_seen: datetime = dataclasses.field(default_factory=datetime.now)
+
+    def __post_init__(self) -> None:
+        """Compute the derived sort keys and incident panel columns."""
+        created_at_dt = datetime.fromisoformat(self.created_at.replace("Z", "+00:00"))
+        assigned = "X" if self.self_assigned else ""
+        # The dataclass is frozen, so set the derived values directly
+        object.__setattr__(self, "created_at_dt", created_at_dt)
+        object.__setattr__(self, "created_ts", created_at_dt.timestamp())
+        object.__setattr__(self, "urgency_rank", URGENCY_RANK.get(self.urgency, 0))
+        object.__setattr__(
+            self,
+            "row_prefix",
+            f"{assigned:^3}|{self.status[:4]:^6}|{self.urgency:^6}|{self.priority:^4}|",
+        )
 
     @classmethod
     def from_dict(cls, incident: dict[str, Any]) -> Incident:
         """Create an Incident from a dict."""
-        priority = incident.get("priority") or {}
         return cls(
             pdid=incident["id"],
             title=incident["title"],
             urgency=incident["urgency"],
             status=incident["status"],
+            priority=(incident.get("priority") or {}).get("summary", ""),
             created_at=incident["created_at"],
-            priority=priority.get("summary", ""),
             self_assigned=Incident._is_assigned(incident),
         )
 
     @staticmethod
     def _is_assigned(incident: dict[str, Any]) -> bool:
         """Return True if the incident is assigned to the user."""
-        assignments = incident.get("assignments", [])
-        ids = {assignment["assignee"]["id"] for assignment in assignments}
-        return secrets.get("PAGERDUTY_USER_ID") in ids
+        assignments = incident.get("assignments", ())
+        return any(a["assignee"]["id"] == USER_ID for a in assignments)
 
 
 @dataclasses.dataclass(frozen=True)
 class Priority:
     """Priority class."""
 
+    __slots__ = ("index", "pdid", "name")
+
     index: int
     pdid: str
     name: str
@@ -86,9 +151,16 @@ class Priority:
 class VConsole:
     """VConsole class for the pdvconsole package."""
 
-    def __init__(self) -> None:
-        """Initialize the VConsole."""
-        self.last_updated: str = datetime.now().strftime("%H:%M:%S")
+    def __init__(self, on_change: Callable[[], None] | None = None) -> None:
+        """
+        Initialize the VConsole.
+
+        Args:
+            on_change: An optional function called whenever state_version is
+                bumped. Always called from the event loop thread.
+        """
+        self._on_change = on_change
+        self.last_updated: str = now_str()
         self.update_interval: int = POLL_TIME_SECONDS
         self.total_incidents: int = 0
         self.total_triggered: int = 0
@@ -96,112 +168,214 @@ class VConsole:
         self.total_assigned: int = 0
         self._incidents: dict[str, Incident] = {}
         self.priorities: list[Priority] = []
+        self._priority_rank: dict[str, int] = {}
+        self._priority_keys: dict[str, str] = {}  # Key press to priority name
+        # (monotonic, priorities) from the last fetch, created lazily in the loop
+        self._priority_cache: tuple[float, list[Priority]] | None = None
+        self._priority_lock: asyncio.Lock | None = None
         self.priority_filter: str | None = None
         self.urgency_filter: str | None = None
         self.sort_by: SortBy = SortBy.CREATED_AT
         self.reverse: bool = False
+        self.state_version: int = 0
+        # (filter key, incidents) from the last time the filtered list was built
+        self._filtered_cache: tuple[tuple[Any, ...], list[Incident]] = ((), [])
 
-    @property
-    def incidents(self) -> list[Incident]:
-        """Return a list of incidents."""
-        incidents_ = list(self._incidents.values())
+    def top_k(self, k: int) -> list[Incident]:
+        """Return the first k filtered incidents in sort order."""
+        select = heapq.nlargest if self.reverse else heapq.nsmallest
+        return select(k, self._filtered_incidents(), key=self._build_sort_key())
 
-        if self.priority_filter:
-            incidents_ = [
-                incident
-                for incident in incidents_
-                if incident.priority == self.priority_filter
-            ]
+    def _filter_key(self) -> tuple[Any, ...]:
+        """Return the key identifying the current data and filters."""
+        return (self.state_version, self.priority_filter, self.urgency_filter)
 
-        if self.urgency_filter:
-            incidents_ = [
-                incident
-                for incident in incidents_
-                if incident.urgency == self.urgency_filter
-            ]
+    def _filtered_incidents(self) -> list[Incident]:
+        """Return the unsorted incidents matching the active filters."""
+        key = self._filter_key()
+        if self._filtered_cache[0] == key:
+            return self._filtered_cache[1]
 
-        incidents_ = sorted(incidents_, key=self._sort_key)
+        predicate = self._build_predicate()
+        filtered = [inc for inc in self._incidents.values() if predicate(inc)]
+        self._filtered_cache = (key, filtered)
+        return filtered
 
-        return incidents_ if not self.reverse else incidents_[::-1]
+    def _build_predicate(self) -> Callable[[Incident], bool]:
+        """Return a filter predicate specialized for the active filters."""
+        priority = self.priority_filter
+        urgency = self.urgency_filter
 
-    def _sort_key(self, incident: Incident) -> tuple[Any, ...]:
-        """Return a tuple of sort keys."""
-        # Sort by priority and created_at
-        if self.sort_by == SortBy.PRIORITY:
-            return (incident.priority, incident.created_at)
+        if priority and urgency:
+            return lambda inc: inc.priority == priority and inc.urgency == urgency
 
-        # Sort by urgency and created_at
-        elif self.sort_by == SortBy.URGENCY:
-            return (incident.urgency, incident.created_at)
+        elif priority:
+            return lambda inc: inc.priority == priority
+
+        elif urgency:
+            return lambda inc: inc.urgency == urgency
 
-        # Sort by created_at by default
         else:
-            return (incident.created_at,)
+            return lambda inc: True
+
+    def _build_sort_key(self) -> Callable[[Incident], Any]:
+        """Return the sort key function for the active sort mode."""
+        # Sort by priority and created_at, unknown priorities rank first
+        if self.sort_by == SortBy.PRIORITY:
+            rank = self._priority_rank
+            return lambda inc: (rank.get(inc.priority, 0), inc.created_ts)
+
+        # Sort by created_at, or urgency and created_at
+        return SORT_KEYS[self.sort_by]
+
+    def _mark_changed(self) -> None:
+        """Bump the state version, which also invalidates the cached incidents."""
+        self.state_version += 1
+        if self._on_change is not None:
+            self._on_change()
+
+    async def get_priorities(self, client: httpx.AsyncClient) -> list[Priority]:
+        """Get priorities, reusing the last result for PRIORITY_CACHE_SECONDS."""
+        if self._priority_lock is None:
+            self._priority_lock = asyncio.Lock()
+
+        # Only one caller refreshes, the rest wait and reuse its result
+        async with self._priority_lock:
+            if self._priority_cache is not None:
+                cached_at, priorities = self._priority_cache
+                if time.monotonic() - cached_at < PRIORITY_CACHE_SECONDS:
+                    return priorities
+
+            priorities = await request_priorities(client)
+            self._priority_cache = (time.monotonic(), priorities)
+
+        return priorities
+
+    def set_priorities(self, priorities: list[Priority]) -> None:
+        """Set the known priorities and their sort rank."""
+        self.priorities = priorities
+        self._priority_rank = {p.name: p.index for p in priorities}
+        self._priority_keys = {str(p.index): p.name for p in priorities}
+        self._mark_changed()
 
     def update(self, incident: Incident) -> None:
         """Update the VConsole."""
-        self._incidents[incident.pdid] = incident
+        self.bulk_update({incident.pdid: incident})
+
+    def bulk_update(self, incidents: dict[str, Incident]) -> bool:
+        """
+        Update the VConsole with a batch of incidents keyed by pdid.
+
+        Returns True if any incident was new or changed.
+        """
+        # Most polls return the same incidents, keep the sorted list if so
+        changed = any(
+            self._incidents.get(pdid) != incident
+            for pdid, incident in incidents.items()
+        )
+        self._incidents.update(incidents)
+        if changed:
+            self._mark_changed()
+
+        return changed
+
+    def clean(self, seen: Collection[str]) -> bool:
+        """
+        Remove incidents not in seen, returns True if any were removed.
+
+        Args:
+            seen: The pdids of every incident returned by the latest poll.
+        """
+        stale = self._incidents.keys() - seen
+        for pdid in stale:
+            del self._incidents[pdid]
 
-    def clean(self) -> None:
-        """Remove incidents not updated after the POLL_TIME_SECONDS parameter."""
-        now = datetime.now()
-        for incident in list(self._incidents.values()):
-            if (now - incident.last_seen).seconds > self.update_interval:
-                del self._incidents[incident.pdid]
+        if stale:
+            self._mark_changed()
+
+        return bool(stale)
 
     def update_counts(self) -> None:
         """Update the incident counts."""
-        self.total_incidents = len(self.incidents)
-        self.total_triggered = len(
-            [inc for inc in self.incidents if inc.status == "triggered"]
-        )
-        self.total_acknowledged = len(
-            [inc for inc in self.incidents if inc.status == "acknowledged"]
-        )
-        self.total_assigned = len([inc for inc in self.incidents if inc.self_assigned])
+        incidents_ = self._filtered_incidents()
+        triggered = acknowledged = assigned = 0
+        for inc in incidents_:
+            if inc.status == "triggered":
+                triggered += 1
+            elif inc.status == "acknowledged":
+                acknowledged += 1
+            if inc.self_assigned:
+                assigned += 1
+
+        self.total_incidents = len(incidents_)
+        self.total_triggered = triggered
+        self.total_acknowledged = acknowledged
+        self.total_assigned = assigned
 
     def on_press(self, key: str) -> bool:
         """Handle key presses."""
         # Filter by priority
-        if key in list("1234567890"):
-            pri_map = {p.index: p.name for p in self.priorities}
+        if key in PRIORITY_KEYS:
             # toggle filter if already selected
-            if pri_map.get(int(key)) == self.priority_filter:
+            if self._priority_keys.get(key) == self.priority_filter:
                 self.priority_filter = None
             else:
-                self.priority_filter = pri_map.get(int(key))
+                self.priority_filter = self._priority_keys.get(key)
+            self._mark_changed()
 
         # Filter by urgency
-        if key.lower() in "hla":
-            self.urgency_filter = {"h": "high", "l": "low", "a": None}.get(key)
+        if key.lower() in URGENCY_KEYS:
+            self.urgency_filter = URGENCY_KEYS[key.lower()]
+            self._mark_changed()
 
         # Rotate SortBy enum selected
         if key.lower() == "s":
             self.sort_by = SortBy((self.sort_by.value + 1) % len(SortBy))
+            self._mark_changed()
 
         # Reverse sort order
         if key.lower() == "r":
             self.reverse = not self.reverse
+            self._mark_changed()
 
         # Quit
-        if key.lower() == "q":
+        if key in QUIT_KEYS:
             return False
 
         return True
 
 
-async def get_priorities() -> list[Priority]:
-    """Get priorities."""
+def now_str() -> str:
+    """Return the current local time as HH:MM:SS, formatted once per second."""
+    global _TIME_CACHE
+
+    second = int(time.time())
+    if second != _TIME_CACHE[0]:
+        _TIME_CACHE = (second, datetime.fromtimestamp(second).strftime("%H:%M:%S"))
+
+    return _TIME_CACHE[1]
+
+
+def build_client() -> httpx.AsyncClient:
+    """Build the shared PagerDuty client, reused across polls to keep connections."""
     headers = {
         "Content-Type": "application/json",
         "Accept": "application/vnd.pagerduty+json;version=2",
         "Authorization": f"Token token={secrets.get('PAGERDUTY_TOKEN')}",
     }
 
-    url = "https://api.pagerduty.com/priorities"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers)
-        resp.raise_for_status()
+    return httpx.AsyncClient(
+        base_url=PAGERDUTY_URL,
+        headers=headers,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(10.0),
+    )
+
+
+async def request_priorities(client: httpx.AsyncClient) -> list[Priority]:
+    """Request priorities from PagerDuty."""
+    resp = await client.get("/priorities")
+    resp.raise_for_status()
 
     priorities = []
     for idx, pri in enumerate(resp.json()["priorities"], start=1):
@@ -210,13 +384,18 @@ async def get_priorities() -> list[Priority]:
     return priorities
 
 
-async def fetch_incidents() -> AsyncGenerator[Incident, None]:
-    """Iterate through incidents."""
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/vnd.pagerduty+json;version=2",
-        "Authorization": f"Token token={secrets.get('PAGERDUTY_TOKEN')}",
-    }
+async def fetch_incidents(
+    client: httpx.AsyncClient,
+    etag: str | None = None,
+) -> tuple[list[Incident] | None, str | None]:
+    """
+    Fetch all open incidents, requesting the remaining pages concurrently.
+
+    Returns the incidents and an ETag to pass on the next call. The incidents
+    are None when PagerDuty reports nothing changed since that ETag. An ETag
+    is only returned when all incidents fit in the first page, as it does not
+    cover the other pages.
+    """
     params = {
         "sort_by": "created_at:desc",
         "statuses[]": ["triggered", "acknowledged"],
@@ -224,18 +403,47 @@ async def fetch_incidents() -> AsyncGenerator[Incident, None]:
         "limit": str(POLL_LIMIT),
         "offset": "0",
     }
-    url = "https://api.pagerduty.com/incidents"
+    semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
 
-    more = True
-    async with httpx.AsyncClient() as client:
-        while more:
-            resp = await client.get(url, headers=headers, params=params)
+    async def fetch_page(offset: int) -> dict[str, Any]:
+        """Fetch a single page of incidents at the given offset."""
+        async with semaphore:
+            resp = await client.get("/incidents", params={**params, "offset": offset})
             resp.raise_for_status()
-            for inc in resp.json()["incidents"]:
-                yield Incident.from_dict(inc)
+        return resp.json()
+
+    # Only the first page asks for the total, it sizes the follow-up requests
+    headers = {"If-None-Match": etag} if etag else {}
+    first_params = {**params, "total": "true"}
+    resp = await client.get("/incidents", params=first_params, headers=headers)
+    if resp.status_code == httpx.codes.NOT_MODIFIED:
+        return None, etag
+
+    resp.raise_for_status()
+    body = resp.json()
+
+    pages = [body["incidents"]]
+    if body.get("more", False):
+        total = body.get("total")
+        if total:
+            offsets = range(POLL_LIMIT, total, POLL_LIMIT)
+            bodies = await asyncio.gather(*(fetch_page(o) for o in offsets))
+            pages.extend(page["incidents"] for page in bodies)
+
+        # Without a total the page count is unknown, walk them in order instead
+        # of returning a partial list that would expire the missing incidents
+        else:
+            offset = POLL_LIMIT
+            while body.get("more", False):
+                body = await fetch_page(offset)
+                pages.append(body["incidents"])
+                offset += POLL_LIMIT
+
+        etag = None
+    else:
+        etag = resp.headers.get("ETag")
 
-            more = resp.json().get("more", False)
-            params["offset"] = str(int(resp.json().get("offset", "0")) + POLL_LIMIT)
+    return [Incident.from_dict(inc) for page in pages for inc in page], etag
 
 
 def vlayout() -> Layout:
@@ -254,45 +462,42 @@ def vlayout() -> Layout:
     return layout
 
 
-def render_incident_panel(pd_details: VConsole, panel_height: int) -> Panel:
-    """Incident Panel."""
-    if len(pd_details.incidents) > panel_height:
+def _format_row(incident: Incident, duration_min: int) -> str:
+    """Format an incident panel row for an incident open duration_min minutes."""
+    return f"{incident.row_prefix}{duration_min:>4}m | {incident.title}"
+
+
+def render_incident_body(pd_details: VConsole, panel_height: int) -> tuple[Text, float]:
+    """Incident Panel body, and the time.time() any shown duration next changes."""
+    pd_details.update_counts()
+    if pd_details.total_incidents > panel_height:
         # -1 for the hidden count line
-        incidents_ = pd_details.incidents[: panel_height - 1]
-        hidden_count = len(pd_details.incidents) - panel_height + 1
+        incidents_ = pd_details.top_k(panel_height - 1)
+        hidden_count = pd_details.total_incidents - panel_height + 1
     else:
         hidden_count = 0
-        incidents_ = pd_details.incidents
+        incidents_ = pd_details.top_k(panel_height)
 
-    pd_details.update_counts()
     string_version = []
+    now = time.time()
+    stale_at = math.inf
     for incident in incidents_:
-        created_at = datetime.strptime(incident.created_at, "%Y-%m-%dT%H:%M:%SZ")
-        open_duration = datetime.utcnow() - created_at
-        string_version.append(
-            INCIDENT_ROW.format(
-                assigned="X" if incident.self_assigned else "",
-                status=incident.status[:4],
-                urgency=incident.urgency,
-                priority=incident.priority,
-                duration=abs(open_duration.total_seconds() / 60),
-                pdid=incident.pdid,
-                title=incident.title,
-            )
-        )
+        duration = round((now - incident.created_ts) / 60)
+        string_version.append(_format_row(incident, duration))
+        # The rounded duration goes up once the next half minute has passed
+        stale_at = min(stale_at, incident.created_ts + (duration + 0.5) * 60)
 
     if hidden_count:
         string_version.append(f"... {hidden_count} more incidents hidden ...")
 
-    text = Text.assemble("\n".join(string_version), overflow="ellipsis", no_wrap=True)
+    body = Text("\n".join(string_version), overflow="ellipsis", no_wrap=True)
+    return body, stale_at
 
-    return Panel(text, title="Incidents", expand=True)
 
-
-def render_details_panel(pd_details: VConsole) -> Panel:
-    """Details Panel."""
-    text = Text.assemble(
-        f"Current time:\n\t{datetime.now().strftime('%H:%M:%S')}\n"
+def render_details_body(pd_details: VConsole) -> Text:
+    """Details Panel body."""
+    return Text.assemble(
+        f"Current time:\n\t{now_str()}\n"
         f"Last updated:\n\t{pd_details.last_updated}\n",
         f"Update interval:\n\t{pd_details.update_interval} seconds\n"
         f"Total incidents:\n\t{pd_details.total_incidents}\n",
@@ -304,8 +509,6 @@ def render_details_panel(pd_details: VConsole) -> Panel:
         f"Urgency filter:\n\t{pd_details.urgency_filter}\n",
     )
 
-    return Panel(text, title="Details", expand=True)
-
 
 def calc_max_height(console: Console) -> int:
     """Calculate the max height of the incident panel."""
@@ -317,69 +520,171 @@ def calc_max_height(console: Console) -> int:
     return max_height
 
 
-async def fetch_priorities(pd_details: VConsole) -> None:
-    """Fetch the priorities."""
-    pd_details.last_updated = "Fetching priorities..."
-    pd_details.priorities = await get_priorities()
+async def fetch_priorities(pd_details: VConsole, client: httpx.AsyncClient) -> str:
+    """
+    Load priorities into pd_details.
+
+    Returns a note for last_updated if the request failed, otherwise "".
+    Incidents can be shown without priorities, so only HTTP errors are caught.
+    """
+    try:
+        priorities = await pd_details.get_priorities(client)
+    except httpx.HTTPError as err:
+        return f" (priorities failed: {type(err).__name__})"
+
+    # Cached results come back as is, only publish a changed list
+    if priorities != pd_details.priorities:
+        pd_details.set_priorities(priorities)
+
+    return ""
+
+
+async def bootstrap(pd_details: VConsole, client: httpx.AsyncClient) -> str | None:
+    """Fetch priorities and the first incidents together, returns the ETag."""
+    pd_details.last_updated = "Loading..."
+    note, (incidents, etag) = await asyncio.gather(
+        fetch_priorities(pd_details, client),
+        fetch_incidents(client),
+    )
+
+    pd_details.bulk_update({incident.pdid: incident for incident in incidents or []})
+    pd_details.last_updated = now_str() + note
+
+    return etag
 
 
-async def update_pd_details(pd_details: VConsole) -> None:
-    """Update the pd_details object."""
-    first_run = True
+async def update_pd_details(pd_details: VConsole, client: httpx.AsyncClient) -> None:
+    """Update the pd_details object, backing off while nothing changes."""
+    etag = await bootstrap(pd_details, client)
+    next_poll = time.monotonic()
 
     while True:
-        if not first_run:
-            pd_details.clean()
-            pd_details.last_updated = datetime.now().strftime("%H:%M:%S")
-            await asyncio.sleep(POLL_TIME_SECONDS)
+        # Keep a fixed cadence regardless of how long the fetch took, without
+        # bursting to catch up if a fetch overran the interval
+        next_poll = max(next_poll + pd_details.update_interval, time.monotonic())
+        await asyncio.sleep(next_poll - time.monotonic())
 
-        first_run = False
         pd_details.last_updated = "Updating..."
 
-        # Fetch the incidents using a generator and update the pd_details object
-        async for incident in fetch_incidents():
-            pd_details.update(incident)
+        # Fetch the incidents and update the pd_details object in one batch
+        incidents, etag = await fetch_incidents(client, etag)
+        if incidents is None:
+            # Not modified since the last poll, every incident is still open
+            changed = False
+        else:
+            staged = {incident.pdid: incident for incident in incidents}
+            changed = pd_details.bulk_update(staged)
+
+            # Anything not returned by this poll has been resolved
+            changed = pd_details.clean(staged.keys()) or changed
+
+        # Retry priorities that failed to load, cheap while the cache is fresh
+        note = ""
+        if not pd_details.priorities:
+            note = await fetch_priorities(pd_details, client)
+        pd_details.last_updated = now_str() + note
+
+        if changed:
+            pd_details.update_interval = POLL_TIME_SECONDS
+        else:
+            interval = pd_details.update_interval * 2
+            pd_details.update_interval = min(interval, POLL_MAX_SECONDS)
 
 
-async def render_vconsole(console: Console, pd_details: VConsole) -> None:
-    """Render the VConsole."""
+async def render_vconsole(
+    console: Console,
+    pd_details: VConsole,
+    redraw: asyncio.Event,
+) -> None:
+    """Render the VConsole when redraw is set, or when the clock ticks over."""
     layout = vlayout()
     layout["header"].update("")
     layout["footer"].update("")
 
-    with Live(layout, refresh_per_second=4, screen=True):
+    # Panels are built once, each frame only swaps their body
+    incident_panel = Panel("", title="Incidents", expand=True)
+    details_panel = Panel("", title="Details", expand=True)
+    layout["incidents"].update(incident_panel)
+    layout["details"].update(details_panel)
+
+    rendered_incidents: tuple[Any, ...] = ()
+    rendered_details: tuple[Any, ...] = ()
+    incidents_stale_at = 0.0  # time.time() a shown open duration next changes
+
+    with Live(layout, auto_refresh=False, screen=True) as live:
         while True:
+            redraw.clear()
             mxh = calc_max_height(console)
+            now = time.time()
+            second = int(now)
+
+            incidents_state = (pd_details.state_version, mxh)
+            details_state = (pd_details.state_version, pd_details.last_updated, second)
+
+            refresh = False
+            if incidents_state != rendered_incidents or now >= incidents_stale_at:
+                body, incidents_stale_at = render_incident_body(pd_details, mxh)
+                incident_panel.renderable = body
+                rendered_incidents = incidents_state
+                refresh = True
 
-            layout["incidents"].update(render_incident_panel(pd_details, mxh))
-            layout["details"].update(render_details_panel(pd_details))
+            if details_state != rendered_details:
+                details_panel.renderable = render_details_body(pd_details)
+                rendered_details = details_state
+                refresh = True
 
-            await asyncio.sleep(0.2)
+            if refresh:
+                live.refresh()
+
+            # Sleep until the next clock second unless something changes first
+            try:
+                await asyncio.wait_for(redraw.wait(), timeout=second + 1 - now)
+            except asyncio.TimeoutError:
+                pass
 
 
 async def catch_stop(
     event_loop: asyncio.AbstractEventLoop,
-    keyboard_listener: KeyboardListener,
+    stop_event: asyncio.Event,
+    client: httpx.AsyncClient,
 ) -> None:
     """Catch the stop event."""
-    while keyboard_listener.is_listening:
-        await asyncio.sleep(0.5)
+    await stop_event.wait()
 
+    await client.aclose()
     event_loop.stop()
 
 
 def main() -> int:
     """Main entry point for the pdvconsole package."""
     console = Console(tab_size=2)
-    pd_details = VConsole()
-    keyboard_listener = KeyboardListener(on_press=pd_details.on_press)
-    keyboard_listener.start()
+    client = build_client()
 
     event_loop = asyncio.get_event_loop()
-    event_loop.create_task(fetch_priorities(pd_details))
-    event_loop.create_task(update_pd_details(pd_details))
-    event_loop.create_task(render_vconsole(console, pd_details))
-    event_loop.create_task(catch_stop(event_loop, keyboard_listener))
+    stop_event = asyncio.Event()
+    redraw = asyncio.Event()
+
+    pd_details = VConsole(on_change=redraw.set)
+
+    def dispatch_press(key: str) -> bool:
+        """Handle a key press on the event loop, return False to stop listening."""
+        # VConsole state is only ever touched from the event loop thread
+        event_loop.call_soon_threadsafe(pd_details.on_press, key)
+        return key not in QUIT_KEYS
+
+    def signal_stop() -> None:
+        """Set the stop event from the keyboard listener thread."""
+        event_loop.call_soon_threadsafe(stop_event.set)
+
+    keyboard_listener = KeyboardListener(
+        on_press=dispatch_press,
+        on_stop=signal_stop,
+    )
+    keyboard_listener.start()
+
+    event_loop.create_task(update_pd_details(pd_details, client))
+    event_loop.create_task(render_vconsole(console, pd_details, redraw))
+    event_loop.create_task(catch_stop(event_loop, stop_event, client))
     event_loop.run_forever()
 
     return 0
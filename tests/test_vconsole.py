@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+import httpx
+import pytest
+
+from pdvconsole import vconsole
+from pdvconsole.vconsole import Incident
+from pdvconsole.vconsole import Priority
+from pdvconsole.vconsole import SortBy
+from pdvconsole.vconsole import VConsole
+
+PRIORITIES = [
+    {"id": "PA", "name": "P1"},
+    {"id": "PB", "name": "P2"},
+    {"id": "PC", "name": "P3"},
+]
+
+
+class StopPolling(Exception):
+    """Raised by the fake sleep to end the polling loop."""
+
+
+def _incident(
+    pdid: str,
+    *,
+    status: str = "triggered",
+    urgency: str = "high",
+    priority: str | None = "P1",
+    minute: int = 0,
+) -> dict[str, Any]:
+    """Return an incident as the PagerDuty API would."""
+    return {
+        "id": pdid,
+        "title": f"Incident {pdid}",
+        "urgency": urgency,
+        "status": status,
+        "created_at": f"2023-01-01T00:{minute:02d}:00Z",
+        "priority": {"summary": priority} if priority else None,
+        "assignments": [],
+    }
+
+
+def _client(handler: Callable[[httpx.Request], httpx.Response]) -> httpx.AsyncClient:
+    """Return a client that routes every request to handler."""
+    transport = httpx.MockTransport(handler)
+    return httpx.AsyncClient(base_url=vconsole.PAGERDUTY_URL, transport=transport)
+
+
+def _priorities_handler(
+    requests: list[httpx.Request],
+) -> Callable[[httpx.Request], httpx.Response]:
+    """Return a handler serving PRIORITIES, recording requests."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"priorities": PRIORITIES})
+
+    return handler
+
+
+def _page(incidents: list[dict[str, Any]]) -> dict[str, Any]:
+    """Return a single page of incidents as the PagerDuty API would."""
+    return {"incidents": incidents, "more": False, "total": None}
+
+
+def _paged_handler(
+    incidents: list[dict[str, Any]],
+    requests: list[httpx.Request],
+    *,
+    with_total: bool = True,
+) -> Callable[[httpx.Request], httpx.Response]:
+    """Return a handler serving incidents in POLL_LIMIT pages, recording requests."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        offset = int(request.url.params["offset"])
+        asked_total = with_total and "total" in request.url.params
+        body = {
+            "incidents": incidents[offset : offset + vconsole.POLL_LIMIT],
+            "more": offset + vconsole.POLL_LIMIT < len(incidents),
+            "total": len(incidents) if asked_total else None,
+        }
+        return httpx.Response(200, json=body, headers={"ETag": "etag-1"})
+
+    return handler
+
+
+def _run_polls(
+    monkeypatch: pytest.MonkeyPatch,
+    vc: VConsole,
+    handler: Callable[[httpx.Request], httpx.Response],
+    polls: int,
+    snapshot: Callable[[VConsole], Any],
+) -> list[Any]:
+    """
+    Run update_pd_details for the given number of polls after bootstrap.
+
+    Returns snapshot(vc) taken each time the loop waits: once after bootstrap
+    and once after every poll.
+    """
+    snapshots: list[Any] = []
+
+    async def fake_sleep(delay: float) -> None:
+        snapshots.append(snapshot(vc))
+        if len(snapshots) > polls:
+            raise StopPolling()
+
+    monkeypatch.setattr(vconsole.asyncio, "sleep", fake_sleep)
+
+    with pytest.raises(StopPolling):
+        asyncio.run(vconsole.update_pd_details(vc, _client(handler)))
+
+    return snapshots
+
+
+def test_incident_uses_slots() -> None:
+    incident = Incident.from_dict(_incident("A"))
+
+    assert not hasattr(incident, "__dict__")
+    assert incident.created_ts == incident.created_at_dt.timestamp()
+    # Derived values stay out of equality and repr
+    assert incident == Incident.from_dict(_incident("A"))
+    assert "row_prefix" not in repr(incident)
+
+
+def test_get_priorities_reuses_cached_result() -> None:
+    requests: list[httpx.Request] = []
+    client = _client(_priorities_handler(requests))
+    vc = VConsole()
+
+    async def get_twice() -> None:
+        first = await vc.get_priorities(client)
+        second = await vc.get_priorities(client)
+        assert second is first
+        assert [p.name for p in first] == ["P1", "P2", "P3"]
+
+    asyncio.run(get_twice())
+
+    assert len(requests) == 1
+
+
+def test_get_priorities_refreshes_expired_result(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(vconsole, "PRIORITY_CACHE_SECONDS", 0)
+    requests: list[httpx.Request] = []
+    client = _client(_priorities_handler(requests))
+    vc = VConsole()
+
+    async def get_twice() -> None:
+        await vc.get_priorities(client)
+        await vc.get_priorities(client)
+
+    asyncio.run(get_twice())
+
+    assert len(requests) == 2
+
+
+def test_bootstrap_survives_priorities_failure() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            return httpx.Response(500)
+        return httpx.Response(200, json=_page([_incident("A")]))
+
+    vc = VConsole()
+    asyncio.run(vconsole.bootstrap(vc, _client(handler)))
+
+    assert vc.priorities == []
+    assert [incident.pdid for incident in vc.top_k(10)] == ["A"]
+    assert vc.last_updated.endswith("(priorities failed: HTTPStatusError)")
+
+
+def test_bootstrap_raises_unexpected_priorities_error() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            return httpx.Response(200, json={"unexpected": []})
+        return httpx.Response(200, json=_page([_incident("A")]))
+
+    with pytest.raises(KeyError):
+        asyncio.run(vconsole.bootstrap(VConsole(), _client(handler)))
+
+
+def test_update_pd_details_retries_priorities(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests: list[httpx.Request] = []
+    serve_priorities = _priorities_handler(requests)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            # Fail only the first attempt
+            if not requests:
+                requests.append(request)
+                return httpx.Response(503)
+            return serve_priorities(request)
+        return httpx.Response(200, json=_page([_incident("A")]))
+
+    snapshots = _run_polls(
+        monkeypatch,
+        VConsole(),
+        handler,
+        polls=2,
+        snapshot=lambda vc: (
+            [p.name for p in vc.priorities],
+            "failed" in vc.last_updated,
+        ),
+    )
+
+    assert snapshots == [
+        ([], True),
+        (["P1", "P2", "P3"], False),
+        (["P1", "P2", "P3"], False),
+    ]
+    # Not requested again once loaded
+    assert len(requests) == 2
+
+
+def test_fetch_incidents_fetches_every_page() -> None:
+    requests: list[httpx.Request] = []
+    raw = [_incident(f"I{idx}") for idx in range(vconsole.POLL_LIMIT * 2 + 1)]
+    handler = _paged_handler(raw, requests)
+
+    incidents, _ = asyncio.run(vconsole.fetch_incidents(_client(handler)))
+
+    assert [incident.pdid for incident in incidents or []] == [i["id"] for i in raw]
+    # Only the first page asks for the total
+    assert [("total" in r.url.params) for r in requests] == [True, False, False]
+
+
+def test_fetch_incidents_walks_pages_without_total() -> None:
+    requests: list[httpx.Request] = []
+    raw = [_incident(f"I{idx}") for idx in range(vconsole.POLL_LIMIT * 2 + 1)]
+    handler = _paged_handler(raw, requests, with_total=False)
+
+    incidents, _ = asyncio.run(vconsole.fetch_incidents(_client(handler)))
+
+    assert [incident.pdid for incident in incidents or []] == [i["id"] for i in raw]
+    offsets = [str(page * vconsole.POLL_LIMIT) for page in range(3)]
+    assert [r.url.params["offset"] for r in requests] == offsets
+
+
+@pytest.mark.parametrize(
+    ("age", "shown", "stale_after"),
+    [
+        (89, "   1m |", 90),
+        (91, "   2m |", 150),
+        (0, "   0m |", 30),
+    ],
+)
+def test_render_incident_body_rounds_durations(
+    monkeypatch: pytest.MonkeyPatch,
+    age: int,
+    shown: str,
+    stale_after: int,
+) -> None:
+    incident = Incident.from_dict(_incident("A"))
+    vc = VConsole()
+    vc.bulk_update({incident.pdid: incident})
+    monkeypatch.setattr(vconsole.time, "time", lambda: incident.created_ts + age)
+
+    body, stale_at = vconsole.render_incident_body(vc, 10)
+
+    assert shown in body.plain
+    assert stale_at == incident.created_ts + stale_after
+
+
+@pytest.mark.parametrize("key", sorted(vconsole.QUIT_KEYS))
+def test_on_press_quit_keys_stop_listening(key: str) -> None:
+    assert VConsole().on_press(key) is False
+
+
+@pytest.mark.parametrize("key", ["s", "r", "h", "1", "x"])
+def test_on_press_other_keys_keep_listening(key: str) -> None:
+    assert VConsole().on_press(key) is True
+
+
+def test_fetch_incidents_not_modified() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["If-None-Match"] == "etag-1"
+        return httpx.Response(304)
+
+    incidents, etag = asyncio.run(vconsole.fetch_incidents(_client(handler), "etag-1"))
+
+    assert incidents is None
+    assert etag == "etag-1"
+
+
+def test_fetch_incidents_keeps_etag_for_single_page() -> None:
+    requests: list[httpx.Request] = []
+    handler = _paged_handler([_incident("A"), _incident("B")], requests)
+
+    incidents, etag = asyncio.run(vconsole.fetch_incidents(_client(handler)))
+
+    assert [incident.pdid for incident in incidents or []] == ["A", "B"]
+    assert etag == "etag-1"
+    assert "If-None-Match" not in requests[0].headers
+
+
+def test_fetch_incidents_drops_etag_for_multiple_pages() -> None:
+    requests: list[httpx.Request] = []
+    raw = [_incident(f"I{idx}") for idx in range(vconsole.POLL_LIMIT + 1)]
+    handler = _paged_handler(raw, requests)
+
+    _, etag = asyncio.run(vconsole.fetch_incidents(_client(handler)))
+
+    assert etag is None
+
+
+def test_update_pd_details_keeps_incidents_when_not_modified(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            return httpx.Response(200, json={"priorities": PRIORITIES})
+        if request.headers.get("If-None-Match") == "etag-1":
+            return httpx.Response(304)
+        page = _page([_incident("A"), _incident("B")])
+        return httpx.Response(200, json=page, headers={"ETag": "etag-1"})
+
+    snapshots = _run_polls(
+        monkeypatch,
+        VConsole(),
+        handler,
+        polls=2,
+        snapshot=lambda vc: (vc.state_version, [i.pdid for i in vc.top_k(10)]),
+    )
+
+    # Nothing is removed or redrawn while PagerDuty reports no changes
+    assert snapshots[1:] == [snapshots[0]] * 2
+    assert sorted(snapshots[0][1]) == ["A", "B"]
+
+
+def test_bulk_update_detects_changes() -> None:
+    vc = VConsole()
+
+    assert vc.bulk_update({"A": Incident.from_dict(_incident("A"))}) is True
+    assert vc.bulk_update({"A": Incident.from_dict(_incident("A"))}) is False
+
+    acked = Incident.from_dict(_incident("A", status="acknowledged"))
+    assert vc.bulk_update({"A": acked}) is True
+    assert vc.top_k(10) == [acked]
+
+
+def test_update_applies_a_single_incident() -> None:
+    changes: list[int] = []
+    vc = VConsole(on_change=lambda: changes.append(vc.state_version))
+    vc.bulk_update({"A": Incident.from_dict(_incident("A"))})
+
+    vc.update(Incident.from_dict(_incident("B")))
+    vc.update(Incident.from_dict(_incident("B")))
+
+    assert sorted(incident.pdid for incident in vc.top_k(10)) == ["A", "B"]
+    # One change for the batch, one for the new incident, none for the repeat
+    assert changes == [1, 2]
+
+
+def test_clean_removes_unseen_incidents() -> None:
+    vc = VConsole()
+    vc.bulk_update({i: Incident.from_dict(_incident(i)) for i in ("A", "B", "C")})
+
+    assert vc.clean({"A", "B", "C"}) is False
+    assert vc.clean({"A"}) is True
+    assert [incident.pdid for incident in vc.top_k(10)] == ["A"]
+
+
+def test_update_pd_details_expires_resolved_incidents(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    polls = [["A", "B", "C"], ["A", "C"], ["C"], ["C", "D"]]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            return httpx.Response(200, json={"priorities": PRIORITIES})
+        return httpx.Response(200, json=_page([_incident(i) for i in polls.pop(0)]))
+
+    snapshots = _run_polls(
+        monkeypatch,
+        VConsole(),
+        handler,
+        polls=3,
+        snapshot=lambda vc: sorted(incident.pdid for incident in vc.top_k(10)),
+    )
+
+    assert snapshots == [["A", "B", "C"], ["A", "C"], ["C"], ["C", "D"]]
+
+
+def test_unchanged_poll_keeps_filtered_incidents() -> None:
+    vc = VConsole()
+    vc.bulk_update({i: Incident.from_dict(_incident(i)) for i in ("A", "B")})
+    filtered = vc._filtered_incidents()
+    version = vc.state_version
+
+    vc.bulk_update({i: Incident.from_dict(_incident(i)) for i in ("A", "B")})
+
+    assert vc.state_version == version
+    assert vc._filtered_incidents() is filtered
+
+
+def test_update_pd_details_backs_off_and_resets(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(vconsole, "POLL_TIME_SECONDS", 10)
+    monkeypatch.setattr(vconsole, "POLL_MAX_SECONDS", 40)
+    polls = [["A"], ["A"], ["A"], ["A", "B"], ["A", "B"], ["A", "B"], ["A", "B"]]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/priorities":
+            return httpx.Response(200, json={"priorities": PRIORITIES})
+        return httpx.Response(200, json=_page([_incident(i) for i in polls.pop(0)]))
+
+    intervals = _run_polls(
+        monkeypatch,
+        VConsole(),
+        handler,
+        polls=6,
+        snapshot=lambda vc: vc.update_interval,
+    )
+
+    # Doubles while unchanged, resets on a new incident, held at the cap
+    assert intervals == [10, 20, 40, 10, 20, 40, 40]
+
+
+def _spread_incidents() -> list[Incident]:
+    """Return incidents with a spread of priorities, urgencies and ages."""
+    priorities = ["P2", None, "P1", "P3", "P1"]
+    urgencies = ["low", "high", "high"]
+    return [
+        Incident.from_dict(
+            _incident(
+                f"I{idx}",
+                urgency=urgencies[idx % len(urgencies)],
+                priority=priorities[idx % len(priorities)],
+                minute=(idx * 7) % 60,
+            )
+        )
+        for idx in range(30)
+    ]
+
+
+@pytest.mark.parametrize("sort_by", list(SortBy))
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("priority_filter", [None, "P1"])
+@pytest.mark.parametrize("urgency_filter", [None, "high"])
+@pytest.mark.parametrize("k", [5, 100])
+def test_top_k_matches_full_sort(
+    sort_by: SortBy,
+    reverse: bool,
+    priority_filter: str | None,
+    urgency_filter: str | None,
+    k: int,
+) -> None:
+    incidents = _spread_incidents()
+    vc = VConsole()
+    vc.set_priorities(
+        [
+            Priority(index=idx, pdid=pri["id"], name=pri["name"])
+            for idx, pri in enumerate(PRIORITIES, start=1)
+        ]
+    )
+    vc.bulk_update({incident.pdid: incident for incident in incidents})
+    vc.sort_by = sort_by
+    vc.reverse = reverse
+    vc.priority_filter = priority_filter
+    vc.urgency_filter = urgency_filter
+
+    # Unprioritized incidents rank ahead of every known priority
+    rank = {"P1": 1, "P2": 2, "P3": 3}
+    sort_keys: dict[SortBy, Callable[[Incident], Any]] = {
+        SortBy.CREATED_AT: lambda inc: inc.created_at_dt,
+        SortBy.PRIORITY: lambda inc: (rank.get(inc.priority, 0), inc.created_at_dt),
+        SortBy.URGENCY: lambda inc: (inc.urgency_rank, inc.created_at_dt),
+    }
+    matching = [
+        incident
+        for incident in incidents
+        if (not priority_filter or incident.priority == priority_filter)
+        and (not urgency_filter or incident.urgency == urgency_filter)
+    ]
+    expected = sorted(matching, key=sort_keys[sort_by], reverse=reverse)[:k]
+
+    assert vc.top_k(k) == expected
+
+
+@pytest.mark.parametrize(
+    ("count", "rows", "hidden_line"),
+    [
+        (8, 4, "... 4 more incidents hidden ..."),
+        (5, 5, None),
+        (0, 0, None),
+    ],
+)
+def test_render_incident_body_hides_overflow(
+    count: int,
+    rows: int,
+    hidden_line: str | None,
+) -> None:
+    vc = VConsole()
+    vc.bulk_update(
+        {f"I{idx}": Incident.from_dict(_incident(f"I{idx}")) for idx in range(count)}
+    )
+
+    body, _ = vconsole.render_incident_body(vc, 5)
+    lines = body.plain.splitlines()
+
+    assert len([line for line in lines if "Incident I" in line]) == rows
+    assert lines[rows:] == ([hidden_line] if hidden_line else [])
+
+
+def test_format_row() -> None:
+    incident = Incident.from_dict(
+        _incident("A", status="acknowledged", urgency="low", priority=None)
+    )
+
+    row = vconsole._format_row(incident, 7)
+
+    assert row == "   | ackn | low  |    |   7m | Incident A"
+
+
+def test_now_str_formats_once_per_second(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[float] = []
+    clock = [1_700_000_000.1]
+
+    class FakeDatetime:
+        @staticmethod
+        def fromtimestamp(timestamp: float) -> datetime:
+            calls.append(timestamp)
+            return datetime(2023, 1, 1, 12, 0, len(calls))
+
+    monkeypatch.setattr(vconsole, "_TIME_CACHE", (0, ""))
+    monkeypatch.setattr(vconsole, "datetime", FakeDatetime)
+    monkeypatch.setattr(vconsole.time, "time", lambda: clock[0])
+
+    first = vconsole.now_str()
+    clock[0] += 0.5
+    assert vconsole.now_str() == first
+    clock[0] += 0.5
+
+    assert vconsole.now_str() != first
+    assert calls == [1_700_000_000, 1_700_000_001]
+
+
+@pytest.mark.parametrize(
+    ("key", "urgency"),
+    [("h", "high"), ("H", "high"), ("l", "low"), ("L", "low"), ("a", None)],
+)
+def test_on_press_sets_urgency_filter(key: str, urgency: str | None) -> None:
+    vc = VConsole()
+    vc.urgency_filter = "unset"
+
+    vc.on_press(key)
+
+    assert vc.urgency_filter == urgency
+
+
+def test_on_press_ignores_empty_key() -> None:
+    vc = VConsole()
+    vc.urgency_filter = "high"
+    version = vc.state_version
+
+    vc.on_press("")
+
+    assert vc.urgency_filter == "high"
+    assert vc.state_version == version
+
+
+def test_on_press_toggles_priority_filter() -> None:
+    vc = VConsole()
+    vc.set_priorities([Priority(index=1, pdid="PA", name="P1")])
+
+    vc.on_press("1")
+    assert vc.priority_filter == "P1"
+    vc.on_press("1")
+    assert vc.priority_filter is None
+    # Keys without a priority clear the filter
+    vc.on_press("1")
+    vc.on_press("9")
+    assert vc.priority_filter is None
+
+
+def test_on_press_changes_sort() -> None:
+    vc = VConsole()
+
+    vc.on_press("s")
+    assert vc.sort_by == SortBy.PRIORITY
+    vc.on_press("S")
+    vc.on_press("s")
+    assert vc.sort_by == SortBy.CREATED_AT
+
+    vc.on_press("r")
+    assert vc.reverse is True
+    vc.on_press("R")
+    assert vc.reverse is False